@@ -11,30 +11,50 @@ def load_digest(path):
     with open(path) as f:
         return json.load(f)
 
+# State filled in by prewarm(); main()/generate_newsletter fall back to
+# loading on demand when it's empty
+_prewarmed = {}
+
+def prewarm():
+    """Load the config, prompt template, and S3 client ahead of time.
+
+    Called from a worker thread while the scraper is still crawling, so the
+    I/O-bound setup overlaps with the previous pipeline stage instead of
+    running after it.
+    """
+    cfg = load_config()
+    _prewarmed['cfg'] = cfg
+    prompt_file = cfg.get('prompt_file', 'prompt.html')
+    with open(prompt_file, encoding='utf-8') as pf:
+        _prewarmed.setdefault('templates', {})[prompt_file] = pf.read()
+    get_s3_client()
+
 def generate_newsletter(entries, cfg):
     openai.api_key = cfg['gpt_api_key']
     model_name = cfg.get('openai_model', 'gpt-4.1-mini')
 
-    # load prompt template
+    # load prompt template (prewarmed copy if available)
     prompt_file = cfg.get('prompt_file', 'prompt.html')
-    with open(prompt_file, encoding='utf-8') as pf:
-        prompt = pf.read().strip() + "\n\n"
-
-    # append each article, gracefully handling missing keys
-    for e in entries:
-        title = e.get('title', '')
-        url = e.get('url', '')
-        summary = e.get('summary', '')
-        prompt += (
-            f"- Title: {title}\n"
-            f"  URL: {url}\n"
-            f"  Summary: {summary}\n\n"
-        )
-
-    prompt += (
+    template = _prewarmed.get('templates', {}).get(prompt_file)
+    if template is None:
+        with open(prompt_file, encoding='utf-8') as pf:
+            template = pf.read()
+    parts = [template.strip() + "\n\n"]
+
+    # append each article, gracefully handling missing keys; build a list and
+    # join once — repeated str += is quadratic for large digests
+    parts.extend(
+        f"- Title: {e.get('title', '')}\n"
+        f"  URL: {e.get('url', '')}\n"
+        f"  Summary: {e.get('summary', '')}\n\n"
+        for e in entries
+    )
+
+    parts.append(
         "Organize by topic if possible. "
         "Include a brief disclaimer and a call-to-action at the end."
     )
+    prompt = "".join(parts)
 
     resp = openai.chat.completions.create(
         model=model_name,
@@ -44,8 +64,18 @@ def generate_newsletter(entries, cfg):
     )
     return resp.choices[0].message.content.strip()
 
+# One S3 client for the process; construction resolves credentials and
+# endpoints, which is the expensive part
+_s3_client = None
+
+def get_s3_client():
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client('s3')
+    return _s3_client
+
 def upload_to_s3(html_content: str, bucket: str, key: str):
-    s3 = boto3.client('s3')
+    s3 = get_s3_client()
     s3.put_object(
         Bucket=bucket,
         Key=key,
@@ -55,7 +85,7 @@ def upload_to_s3(html_content: str, bucket: str, key: str):
     print(f"Uploaded newsletter to s3://{bucket}/{key}")
 
 def main():
-    cfg = load_config()
+    cfg = _prewarmed.get('cfg') or load_config()
     digest = load_digest(cfg.get('output_path', 'digest.json'))
     if not digest:
         print("No entries found in", cfg.get('output_path'))
@@ -64,21 +94,22 @@ def main():
     # generate content
     newsletter = generate_newsletter(digest, cfg)
     fname = cfg.get('email_output', 'newsletter.html')
+    html_body = f"Date: {datetime.utcnow().date()}\n\n{newsletter}"
 
-    # write local copy (optional)
-    with open(fname, 'w', encoding='utf-8') as f:
-        f.write(f"Date: {datetime.utcnow().date()}\n\n")
-        f.write(newsletter)
-    print(f"Wrote newsletter to {fname}")
-
-    # upload newsletter to S3
+    # upload newsletter to S3 straight from memory (no disk round-trip)
     bucket = cfg['s3_bucket']
     key_prefix = cfg.get('s3_key_prefix', 'newsletters')
     key = f"{key_prefix}/{fname}"
-    with open(fname, 'r', encoding='utf-8') as f:
-        html_body = f.read()
     upload_to_s3(html_body, bucket, key)
 
+    # local copy is best-effort
+    try:
+        with open(fname, 'w', encoding='utf-8') as f:
+            f.write(html_body)
+        print(f"Wrote newsletter to {fname}")
+    except OSError as e:
+        print(f"WARNING: could not write local copy {fname}: {e}")
+
     print("Generation and upload complete; exiting.")
 
 if __name__ == '__main__':
@@ -0,0 +1,40 @@
+"""SQLite-backed cache for GPT completions.
+
+Keys are a sha256 over (model + system prompt + user content), so a cache
+hit means the exact same question was already answered — repeat crawls of
+unchanged pages skip the OpenAI round-trip entirely.
+"""
+import sqlite3
+import threading
+import time
+
+
+class GptCache:
+    def __init__(self, path):
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, model TEXT, created INT, completion TEXT)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completion FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, model: str, completion: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, created, completion) VALUES (?, ?, ?, ?)",
+                (key, model, int(time.time()), completion)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
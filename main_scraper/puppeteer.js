@@ -1,5 +1,12 @@
 // puppeteer.js — hardened version for science news scraping
+//
+// Two modes:
+//   node puppeteer.js <url>     one-shot: scrape a single URL, print JSON, exit
+//   node puppeteer.js --serve   sidecar: launch Chromium once, then read
+//                               {"id": n, "url": "..."} lines on stdin and
+//                               answer with one JSON line per request
 const puppeteer = require('puppeteer');
+const readline = require('readline');
 // Optional: install with `npm install puppeteer-extra puppeteer-extra-plugin-stealth`
 // const puppeteer = require('puppeteer-extra');
 // const stealth = require('puppeteer-extra-plugin-stealth');
@@ -22,36 +29,29 @@ async function autoScroll(page, maxScrolls = 15, scrollDelay = 1200) {
   }
 }
 
-async function main() {
-  const url = process.argv[2];
-  if (!url) {
-    console.error('Usage: node puppeteer.js <url>');
-    process.exit(1);
-  }
+async function launchBrowser() {
+  return puppeteer.launch({
+    headless: true, // Use 'true' for stability on servers
+    args: [
+      '--no-sandbox',
+      '--disable-setuid-sandbox',
+      '--disable-dev-shm-usage', // Critical for low-memory environments
+      '--disable-gpu',
+      '--disable-web-security',
+      '--allow-running-insecure-content',
+      '--disable-features=TranslateUI',
+      '--no-first-run',
+      '--no-default-browser-check',
+      '--disable-blink-features=AutomationControlled'
+    ],
+    defaultViewport: { width: 1280, height: 800 },
+    timeout: 60000
+  });
+}
 
-  let browser;
+async function scrapeUrl(browser, url) {
+  const page = await browser.newPage();
   try {
-    browser = await puppeteer.launch({
-      headless: true, // Use 'true' for stability on servers
-      args: [
-        '--no-sandbox',
-        '--disable-setuid-sandbox',
-        '--disable-dev-shm-usage', // Critical for low-memory environments
-        '--disable-gpu',
-        '--single-process', // Save memory
-        '--disable-web-security',
-        '--allow-running-insecure-content',
-        '--disable-features=TranslateUI',
-        '--no-first-run',
-        '--no-default-browser-check',
-        '--disable-blink-features=AutomationControlled'
-      ],
-      defaultViewport: { width: 1280, height: 800 },
-      timeout: 60000
-    });
-
-    const page = await browser.newPage();
-
     // Realistic user agent
     await page.setUserAgent(
       'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
@@ -123,6 +123,96 @@ async function main() {
       };
     });
 
+    return data;
+  } finally {
+    try {
+      await page.close();
+    } catch {}
+  }
+}
+
+// Sidecar mode: one browser for the whole crawl; Node startup and Chromium
+// launch are paid once instead of once per page. Requests are dispatched
+// concurrently (each on its own page, up to MAX_CONCURRENT_PAGES) and
+// responses carry the request id, so they may arrive out of order.
+const MAX_CONCURRENT_PAGES = 4;
+
+async function serve() {
+  const browser = await launchBrowser();
+  const rl = readline.createInterface({ input: process.stdin, terminal: false });
+
+  // Tiny counting semaphore bounding concurrent pages
+  let active = 0;
+  const waiters = [];
+  const acquirePage = () => {
+    if (active < MAX_CONCURRENT_PAGES) {
+      active++;
+      return Promise.resolve();
+    }
+    return new Promise(resolve => waiters.push(resolve));
+  };
+  const releasePage = () => {
+    const next = waiters.shift();
+    if (next) next();
+    else active--;
+  };
+
+  const handle = async (req) => {
+    await acquirePage();
+    try {
+      const data = await withTimeout(scrapeUrl(browser, req.url), 85000);
+      if (!data.body || data.body.length < 100) {
+        process.stdout.write(JSON.stringify({ id: req.id, error: 'No usable content extracted' }) + '\n');
+      } else {
+        process.stdout.write(JSON.stringify({ id: req.id, ...data }) + '\n');
+      }
+    } catch (err) {
+      process.stdout.write(JSON.stringify({ id: req.id, error: err.message || err.toString() }) + '\n');
+    } finally {
+      releasePage();
+    }
+  };
+
+  const inFlight = new Set();
+  for await (const line of rl) {
+    if (!line.trim()) continue;
+    let req;
+    try {
+      req = JSON.parse(line);
+    } catch (err) {
+      process.stdout.write(JSON.stringify({ error: `bad request: ${err.message}` }) + '\n');
+      continue;
+    }
+    const p = handle(req).finally(() => inFlight.delete(p));
+    inFlight.add(p);
+  }
+
+  await Promise.allSettled([...inFlight]);
+  await browser.close();
+}
+
+async function main() {
+  if (process.argv[2] === '--serve') {
+    try {
+      await serve();
+      process.exit(0);
+    } catch (err) {
+      console.error(`[PUPPETEER ERROR] ${err.message || err.toString()}`);
+      process.exit(2);
+    }
+  }
+
+  const url = process.argv[2];
+  if (!url) {
+    console.error('Usage: node puppeteer.js <url> | node puppeteer.js --serve');
+    process.exit(1);
+  }
+
+  let browser;
+  try {
+    browser = await launchBrowser();
+    const data = await scrapeUrl(browser, url);
+
     // Ensure minimal content length before sending
     if (!data.body || data.body.length < 100) {
       console.error('[ERROR] No usable content extracted');
@@ -144,4 +234,4 @@ async function main() {
   }
 }
 
-main();
\ No newline at end of file
+main();
@@ -1,12 +1,43 @@
 import os
+import asyncio
+import hashlib
+import heapq
 import json
 import re
 import subprocess
+import threading
 import scrapy
 from scrapy.crawler import CrawlerProcess
+from twisted.internet.threads import deferToThread
 import httpx
+from functools import lru_cache
 from pathlib import Path
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+try:
+    from main_scraper._gpt_cache import GptCache
+except ImportError:
+    from _gpt_cache import GptCache  # running as a plain script
+
+# orjson is 2-10x faster than stdlib json on the ~9KB payloads we shuttle
+# per page; fall back to stdlib when it isn't installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _json_loads(s):
+        return orjson.loads(s)
+else:
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    def _json_loads(s):
+        return json.loads(s)
 
 # =================== knobs ===================
 # Depth counting: seed pages start at depth 0
@@ -16,6 +47,8 @@ EXTRA_LINKS_ON_FOLLOW = 1      # when GPT picks a link, also schedule up to this
 LINKS_FOR_GPT = 30             # links shown to GPT (cap tokens)
 EXTRACT_LINKS_LIMIT = 80       # how many <a> to scan from the DOM
 MAX_PAGES_BUDGET = 350         # emergency stop for huge sites
+RELEVANCE_BATCH_SIZE = 20      # pages per batched relevance call
+RELEVANCE_BATCH_CHAR_BUDGET = 24000  # ~6k input tokens at ~4 chars/token; flush early when reached
 # =============================================
 
 # -------- paths / config --------
@@ -50,12 +83,52 @@ except Exception as e:
 # Resolve output path relative to base directory
 OUTPUT_PATH = (BASE_DIR / CFG.get("output_path", "digest.json")).resolve()
 
+# One pooled client for all OpenAI calls: reusing the socket skips a TLS
+# handshake (~1 RTT + crypto) on every request after the first.
+def _make_openai_client():
+    kwargs = dict(
+        base_url="https://api.openai.com",
+        timeout=60,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        headers={"Authorization": f"Bearer {GPT_API_KEY}"},
+    )
+    try:
+        return httpx.Client(http2=True, **kwargs)
+    except ImportError:
+        # h2 not installed; keep-alive over HTTP/1.1 still avoids the handshakes
+        return httpx.Client(**kwargs)
+
+_OPENAI = _make_openai_client()
+
+def _make_openai_async_client():
+    """Async twin of _make_openai_client, for firing a burst of calls at once."""
+    kwargs = dict(
+        base_url="https://api.openai.com",
+        timeout=60,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        headers={"Authorization": f"Bearer {GPT_API_KEY}"},
+    )
+    try:
+        return httpx.AsyncClient(http2=True, **kwargs)
+    except ImportError:
+        return httpx.AsyncClient(**kwargs)
+
+# On-disk completion cache so repeat crawls of unchanged pages skip OpenAI
+# entirely; disable with "gpt_cache": false in config.json.
+_GPT_CACHE = GptCache(BASE_DIR / "gpt_cache.sqlite3") if CFG.get("gpt_cache", True) else None
+
 # Simple pipeline path
 PIPELINE_PATH = "__main__.CollectPipeline"
 
 
 # ----------------- helper utils (no content keywords) -----------------
 
+# One urlsplit per distinct URL: the same base_url (and many repeated hrefs)
+# get parsed dozens of times per page otherwise.
+@lru_cache(maxsize=4096)
+def _split(url: str):
+    return urlsplit(url)
+
 def normalize_netloc(netloc: str) -> str:
     netloc = netloc.split(":")[0].lower()
     if netloc.startswith("www."):
@@ -64,7 +137,7 @@ def normalize_netloc(netloc: str) -> str:
 
 def same_site(url: str, base_netloc: str) -> bool:
     try:
-        n1 = normalize_netloc(urlparse(url).netloc)
+        n1 = normalize_netloc(_split(url).netloc)
         n2 = normalize_netloc(base_netloc)
         if not n1 or not n2:
             return False
@@ -72,46 +145,48 @@ def same_site(url: str, base_netloc: str) -> bool:
     except Exception:
         return False
 
+def canon(u: str) -> str:
+    """Canonical form used for dedup only (never for fetching):
+    lowercase host minus www., no fragment, sorted query, no trailing slash.
+    Collapses the near-duplicates that index pages love to emit."""
+    try:
+        p = _split(u)
+        netloc = p.netloc.lower()
+        if netloc.startswith("www."):
+            netloc = netloc[4:]
+        query = "&".join(sorted(p.query.split("&"))) if p.query else ""
+        return urlunsplit((p.scheme.lower(), netloc, p.path.rstrip("/") or "/", query, ""))
+    except Exception:
+        return u
+
 def extract_links_from_response(response: scrapy.http.Response, limit: int = EXTRACT_LINKS_LIMIT):
     links = []
     try:
-        for a in response.css("a"):
-            href = a.attrib.get("href")
+        # One XPath pass over the raw lxml tree: response.css("a") wraps every
+        # element in a Selector and a.xpath("string(.)") walks each subtree a
+        # second time; el.text_content() does the same walk in C.
+        for el in response.selector.root.xpath(".//a[@href]")[:limit]:
+            href = el.get("href")
             if not href:
                 continue
             abs_url = response.urljoin(href)
-            text = (a.xpath("string(.)").get() or "").strip()
+            text = (el.text_content() or "").strip()[:200]
             if not text and not abs_url:
                 continue
-            links.append({"text": text[:200], "href": abs_url})
-            if len(links) >= limit:
-                break
+            links.append({"text": text, "href": abs_url})
     except Exception:
         pass
     return links
 
-def structural_score_link(href: str, text: str, base_url: str) -> int:
-    """
-    Purely structural (no content keywords):
-    - same site
-    - not mailto/javascript/anchor
-    - prefer deeper paths
-    - prefer non-root paths
-    - prefer links with more descriptive anchor text
-    - slight bonus for .html/.htm
-    """
+def _score_link_parts(href: str, parts, text: str) -> int:
+    """Score an already-parsed link; the caller has verified same-site."""
     score = 0
 
-    # same site check happens before calling this (for speed),
-    # but we keep a tiny safeguard here
-    if not same_site(href, urlparse(base_url).netloc):
-        return -999
-
     l = href.lower()
     if l.startswith("mailto:") or l.startswith("javascript:") or l.startswith("#"):
         return -999
 
-    path = urlparse(href).path or "/"
+    path = parts.path or "/"
     # depth bonus
     depth = len([p for p in path.strip("/").split("/") if p])
     if depth >= 1:
@@ -140,36 +215,164 @@ def structural_score_link(href: str, text: str, base_url: str) -> int:
 
     return score
 
+def structural_score_link(href: str, text: str, base_url: str) -> int:
+    """
+    Purely structural (no content keywords):
+    - same site
+    - not mailto/javascript/anchor
+    - prefer deeper paths
+    - prefer non-root paths
+    - prefer links with more descriptive anchor text
+    - slight bonus for .html/.htm
+    """
+    if not same_site(href, _split(base_url).netloc):
+        return -999
+    return _score_link_parts(href, _split(href), text)
+
 def filter_candidate_links_broad(links, base_url, max_out=MAX_FANOUT_INDEX):
     """
     Keep likely content links using only structural signals.
     """
-    base_netloc = urlparse(base_url).netloc
+    base_netloc = _split(base_url).netloc
     scored = []
     seen = set()
     for link in links:
         href = (link.get("href") or "").strip()
         text = (link.get("text") or "").strip()
-        if not href or href in seen:
+        if not href:
+            continue
+        key = canon(href)
+        if key in seen:
             continue
-        seen.add(href)
+        seen.add(key)
 
         if not same_site(href, base_netloc):
             continue
 
-        score = structural_score_link(href, text, base_url)
+        score = _score_link_parts(href, _split(href), text)
         if score <= -999:
             continue
         scored.append((score, {"text": text, "href": href}))
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [item for _, item in scored[:max_out]]
+    # max_out is tiny (<=2-ish): a partial selection beats a full sort
+    top = heapq.nlargest(max_out, scored, key=lambda x: x[0])
+    return [item for _, item in top]
+
+# Only skip obvious non-content scaffolding
+SCAFFOLDING_TERMS = [
+    "privacy policy", "terms of use", "about us", "contact",
+    "advertise with us", "copyright", "login", "sign up",
+    "cookie policy", "accessibility statement"
+]
+
+# Scan the content once for all terms instead of one substring pass per term.
+# pyahocorasick builds a C automaton; the fallback is a single compiled
+# alternation, which also skips the per-page lowercase copy via IGNORECASE.
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+if ahocorasick is not None:
+    _SCAFFOLD_AC = ahocorasick.Automaton()
+    for _term in SCAFFOLDING_TERMS:
+        _SCAFFOLD_AC.add_word(_term, _term)
+    _SCAFFOLD_AC.make_automaton()
+
+    def looks_like_scaffolding(content: str) -> bool:
+        if not content:
+            return False
+        return next(_SCAFFOLD_AC.iter(content.lower()), None) is not None
+else:
+    _SCAFFOLD_RE = re.compile("|".join(re.escape(t) for t in SCAFFOLDING_TERMS), re.IGNORECASE)
+
+    def looks_like_scaffolding(content: str) -> bool:
+        return bool(content) and _SCAFFOLD_RE.search(content) is not None
+
+# Compiled once; strips ``` / ```json fences around GPT output
+_CODEFENCE = re.compile(r'^```(?:json)?\s*|\s*```$', re.MULTILINE)
+
+def _find_json_span(s: str, open_ch: str = "{", close_ch: str = "}"):
+    """Return the first balanced top-level JSON object/array in s, or None.
+
+    A single string-aware forward scan; cheaper than running a greedy
+    DOTALL regex over every GPT response.
+    """
+    start = s.find(open_ch)
+    if start == -1:
+        return None
+    depth = 0
+    in_str = False
+    esc = False
+    for i in range(start, len(s)):
+        c = s[i]
+        if in_str:
+            if esc:
+                esc = False
+            elif c == "\\":
+                esc = True
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c == open_ch:
+            depth += 1
+        elif c == close_ch:
+            depth -= 1
+            if depth == 0:
+                return s[start:i + 1]
+    return None
+
+# Optional: slice prompts on token boundaries instead of chars
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_WS_RE = re.compile(r"\s+")
+
+def _normalize_body(s: str) -> str:
+    """Squeeze boilerplate out of page text before it hits a char/token cap:
+    collapse whitespace runs, drop sub-3-char fragments, and dedupe adjacent
+    identical lines (repeated nav blocks). The cap then holds more of the
+    actual article, and every prompt ships fewer tokens."""
+    if not s:
+        return ""
+    lines = []
+    prev = None
+    for raw in s.splitlines():
+        line = _WS_RE.sub(" ", raw).strip()
+        if len(line) < 3:
+            continue
+        if line == prev:
+            continue
+        lines.append(line)
+        prev = line
+    return "\n".join(lines)
+
+if tiktoken is not None:
+    @lru_cache(maxsize=4)
+    def _encoding_for(model: str):
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+
+    def _clip_tokens(text: str, model: str, max_tokens: int = 2048) -> str:
+        tokens = _encoding_for(model).encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return _encoding_for(model).decode(tokens[:max_tokens])
+else:
+    def _clip_tokens(text: str, model: str, max_tokens: int = 2048) -> str:
+        # ~4 chars/token heuristic when tiktoken isn't installed
+        return text[:max_tokens * 4]
 
 def package_body_and_links_for_gpt(body_text: str, links: list):
     """Give GPT a compact JSON payload it can read reliably."""
-    body_snip = body_text[:8000]
+    body_snip = _normalize_body(body_text)[:8000]
     payload = {"body": body_snip, "links": links[:LINKS_FOR_GPT]}
-    return json.dumps(payload, ensure_ascii=False)
+    return _json_dumps(payload)
 
 
 class ScienceTechSpider(scrapy.Spider):
@@ -178,6 +381,13 @@ class ScienceTechSpider(scrapy.Spider):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.visited_urls = set()
+        self.pending_relevance = []
+        self._batch_lock = threading.Lock()  # parse now runs on threadpool threads
+        # Long-running Node sidecar (started lazily); one Chromium for the whole crawl
+        self._node = None
+        self._node_lock = threading.Lock()
+        self._node_request_id = 0
+        self._node_waiters = {}  # request id -> waiter dict, guarded by _node_lock
 
     def start_requests(self):
         urls_file = BASE_DIR / "web_search.txt"
@@ -203,6 +413,46 @@ class ScienceTechSpider(scrapy.Spider):
             )
 
     def handle_error(self, failure):
+        # Puppeteer + GPT work blocks; keep it off the reactor thread so
+        # Scrapy's concurrency settings can actually overlap pages.
+        return deferToThread(self._handle_error_blocking, failure)
+
+    def _handle_error_blocking(self, failure):
+        return list(self._handle_error_impl(failure))
+
+    def _page_request(self, href: str, breadcrumbs: list, depth: int, response=None):
+        meta = {"breadcrumbs": breadcrumbs + [href], "depth": depth + 1}
+        if response is not None:
+            # response.follow reuses the response's parsed base URL — the
+            # Scrapy-idiomatic path when we have a response in hand
+            return response.follow(
+                href, callback=self.parse, errback=self.handle_error, meta=meta
+            )
+        # error path: no response object to follow from
+        return scrapy.Request(
+            url=href,
+            callback=self.parse,
+            errback=self.handle_error,
+            meta=meta,
+            dont_filter=False
+        )
+
+    def _schedule_candidates(self, candidates, breadcrumbs, depth, limit, skip=None, response=None):
+        """Yield requests for scored candidates, applying the shared
+        visited/depth/limit checks in one place."""
+        if depth >= MAX_DEPTH:
+            return
+        scheduled = 0
+        for cand in candidates:
+            if scheduled >= limit:
+                break
+            href = cand.get("href")
+            if not href or href == skip or canon(href) in self.visited_urls:
+                continue
+            scheduled += 1
+            yield self._page_request(href, breadcrumbs, depth, response=response)
+
+    def _handle_error_impl(self, failure):
         url = getattr(failure.request, "url", "unknown")
         self.logger.error(f"Error crawling: {url} -> {failure.getErrorMessage()}")
 
@@ -217,60 +467,43 @@ class ScienceTechSpider(scrapy.Spider):
             return
 
         links = rendered.get("links", []) if isinstance(rendered, dict) else []
-        content_for_gpt = package_body_and_links_for_gpt(text_content, links)
 
         breadcrumbs = failure.request.meta.get("breadcrumbs", [url])
         depth = int(failure.request.meta.get("depth", 0))
 
+        # At max depth there is nothing left to follow — go straight to relevance
+        if depth >= MAX_DEPTH:
+            yield from self.queue_relevance_check(text_content, url)
+            return
+
+        content_for_gpt = package_body_and_links_for_gpt(text_content, links)
         next_action = self.gpt_navigation_decision(content_for_gpt, url, breadcrumbs, depth)
 
         if not next_action or next_action.get("action") == "decide":
-            item = self.gpt_sci_tech_relevance_check(text_content, url)
-            if item:
-                self.logger.info(f"✅ Yielding relevant item (error path): {item.get('url', 'unknown')}")
-                yield item
-            else:
-                candidates = filter_candidate_links_broad(links, url, max_out=MAX_FANOUT_INDEX) if links else []
-                for cand in candidates:
-                    href = cand.get("href")
-                    if href and href not in self.visited_urls and depth < MAX_DEPTH:
-                        yield scrapy.Request(
-                            url=href,
-                            callback=self.parse,
-                            errback=self.handle_error,
-                            meta={"breadcrumbs": breadcrumbs + [href], "depth": depth + 1},
-                            dont_filter=False
-                        )
+            yield from self.queue_relevance_check(text_content, url)
         elif next_action.get("action") == "follow_link":
             next_url = next_action.get("url")
             if next_url and depth < MAX_DEPTH:
-                yield scrapy.Request(
-                    url=next_url,
-                    callback=self.parse,
-                    errback=self.handle_error,
-                    meta={"breadcrumbs": breadcrumbs + [next_url], "depth": depth + 1},
-                    dont_filter=False
-                )
-            else:
-                candidates = filter_candidate_links_broad(links, url, max_out=MAX_FANOUT_INDEX) if links else []
-                for cand in candidates:
-                    href = cand.get("href")
-                    if href and href not in self.visited_urls and depth < MAX_DEPTH:
-                        yield scrapy.Request(
-                            url=href,
-                            callback=self.parse,
-                            errback=self.handle_error,
-                            meta={"breadcrumbs": breadcrumbs + [href], "depth": depth + 1},
-                            dont_filter=False
-                        )
+                yield self._page_request(next_url, breadcrumbs, depth)
+            elif links:
+                candidates = filter_candidate_links_broad(links, url, max_out=MAX_FANOUT_INDEX)
+                yield from self._schedule_candidates(candidates, breadcrumbs, depth, limit=MAX_FANOUT_INDEX)
 
     def parse(self, response):
+        # Same threadpool hop as handle_error; the returned Deferred resolves
+        # to the list of requests/items this page produced.
+        return deferToThread(self._parse_blocking, response)
+
+    def _parse_blocking(self, response):
+        return list(self._parse_impl(response))
+
+    def _parse_impl(self, response):
         current_url = response.url
 
         # Mark visited only when actually parsing the response
-        if current_url in self.visited_urls:
+        if canon(current_url) in self.visited_urls:
             return
-        self.visited_urls.add(current_url)
+        self.visited_urls.add(canon(current_url))
 
         depth = int(response.meta.get("depth", 0))
         self.logger.info(f"Navigating (depth={depth}) -> {current_url}")
@@ -291,6 +524,11 @@ class ScienceTechSpider(scrapy.Spider):
 
         breadcrumbs = response.meta.get("breadcrumbs", [current_url])
 
+        # At max depth there is nothing left to follow — go straight to relevance
+        if depth >= MAX_DEPTH:
+            yield from self.queue_relevance_check(text_content, current_url)
+            return
+
         # Always provide GPT a compact {body, links} payload so it can choose
         content_for_gpt = package_body_and_links_for_gpt(text_content, links)
 
@@ -299,52 +537,30 @@ class ScienceTechSpider(scrapy.Spider):
 
         # 2) If GPT says "decide", run relevance; else follow link(s)
         if not next_action or next_action.get("action") == "decide":
-            item = self.gpt_sci_tech_relevance_check(text_content, current_url)
-            if item:
-                self.logger.info(f"✅ Yielding relevant item from: {current_url}")
-                yield item
-            else:
-                if depth < MAX_DEPTH:
-                    candidates = filter_candidate_links_broad(links, current_url, max_out=MAX_FANOUT_INDEX)
-                    for cand in candidates:
-                        href = cand.get("href")
-                        if href and href not in self.visited_urls:
-                            yield scrapy.Request(
-                                url=href,
-                                callback=self.parse,
-                                errback=self.handle_error,
-                                meta={"breadcrumbs": breadcrumbs + [href], "depth": depth + 1},
-                                dont_filter=False
-                            )
+            yield from self.queue_relevance_check(text_content, current_url)
         elif next_action.get("action") == "follow_link":
             picked = next_action.get("url")
             scheduled = 0
-            if picked and picked not in self.visited_urls and depth < MAX_DEPTH:
+            if picked and canon(picked) not in self.visited_urls and depth < MAX_DEPTH:
                 scheduled += 1
-                yield scrapy.Request(
-                    url=picked,
-                    callback=self.parse,
-                    errback=self.handle_error,
-                    meta={"breadcrumbs": breadcrumbs + [picked], "depth": depth + 1},
-                    dont_filter=False
-                )
-            if depth < MAX_DEPTH and EXTRA_LINKS_ON_FOLLOW > 0:
+                yield self._page_request(picked, breadcrumbs, depth, response=response)
+            if EXTRA_LINKS_ON_FOLLOW > 0:
+                # score once at the larger budget, then let the shared helper
+                # apply the remaining-slot limit and skip the picked URL
                 extras = filter_candidate_links_broad(links, current_url, max_out=EXTRA_LINKS_ON_FOLLOW + 1)
-                for cand in extras:
-                    href = cand.get("href")
-                    if href and href != picked and href not in self.visited_urls and scheduled < (1 + EXTRA_LINKS_ON_FOLLOW):
-                        scheduled += 1
-                        yield scrapy.Request(
-                            url=href,
-                            callback=self.parse,
-                            errback=self.handle_error,
-                            meta={"breadcrumbs": breadcrumbs + [href], "depth": depth + 1},
-                            dont_filter=False
-                        )
+                yield from self._schedule_candidates(
+                    extras, breadcrumbs, depth,
+                    limit=(1 + EXTRA_LINKS_ON_FOLLOW) - scheduled, skip=picked,
+                    response=response
+                )
         else:
             self.logger.warning(f"Unknown action from GPT: {next_action.get('action')}")
 
-    def puppeteer(self, url: str):
+    def _ensure_node(self):
+        """Start (or restart) the Node sidecar; caller must hold _node_lock."""
+        if self._node is not None and self._node.poll() is None:
+            return True
+
         node_bin = os.environ.get("NODE_BIN", "node")
         # Look for puppeteer.js in the same directory as this script, else base dir
         script_path = Path(__file__).resolve().parent / "puppeteer.js"
@@ -353,44 +569,309 @@ class ScienceTechSpider(scrapy.Spider):
 
         if not script_path.exists():
             self.logger.error(f"Puppeteer script not found at {script_path}")
-            return None
+            return False
 
         try:
-            result = subprocess.run(
-                [node_bin, str(script_path), url],
-                capture_output=True,
+            self._node = subprocess.Popen(
+                [node_bin, str(script_path), "--serve"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                bufsize=1,
                 text=True,
                 encoding="utf-8",
-                errors="replace",
-                timeout=90
+                errors="replace"
             )
-            if result.returncode == 0 and result.stdout.strip():
-                # Expecting JSON like {"body": "...", "links":[{"text":"...","href":"..."}]}
-                return json.loads(result.stdout)
-            else:
-                self.logger.error(
-                    f"Puppeteer error for {url} (rc={result.returncode}):\n"
-                    f"STDOUT: {result.stdout[:500]}\nSTDERR: {result.stderr[:500]}"
-                )
-                return None
+            # One reader thread per sidecar process: responses come back in
+            # completion order, so they're matched to waiters by id rather
+            # than by holding a lock across the whole render
+            threading.Thread(
+                target=self._read_node_responses, args=(self._node,), daemon=True
+            ).start()
+            self.logger.info(f"Started puppeteer sidecar (pid={self._node.pid})")
+            return True
         except FileNotFoundError:
             self.logger.error(f"Node not found at {node_bin}. Set NODE_BIN or install Node.")
         except Exception as e:
-            self.logger.error(f"Puppeteer call failed for {url}: {e}")
-        return None
+            self.logger.error(f"Failed to start puppeteer sidecar: {e}")
+        self._node = None
+        return False
+
+    def _kill_node(self):
+        if self._node is not None:
+            try:
+                self._node.terminate()
+            except Exception:
+                pass
+            self._node = None
+
+    def _read_node_responses(self, proc):
+        """Reader-thread loop: route sidecar NDJSON responses to waiters by id."""
+        for line in proc.stdout:
+            try:
+                # Expecting JSON like {"id": n, "body": "...", "links":[{"text":"...","href":"..."}]}
+                rendered = _json_loads(line)
+            except ValueError as e:
+                self.logger.error(f"Bad sidecar response: {e} — Raw: {line[:200]}")
+                continue
+            with self._node_lock:
+                waiter = self._node_waiters.pop(rendered.get("id"), None)
+            if waiter is None:
+                self.logger.error(f"Sidecar response with unknown id {rendered.get('id')}")
+                continue
+            waiter["result"] = rendered
+            waiter["event"].set()
+        # EOF: the sidecar exited — fail anything still in flight
+        with self._node_lock:
+            orphans, self._node_waiters = self._node_waiters, {}
+        for waiter in orphans.values():
+            waiter["event"].set()
+
+    def puppeteer(self, url: str):
+        waiter = {"event": threading.Event(), "result": None}
+        with self._node_lock:
+            if not self._ensure_node():
+                return None
+
+            self._node_request_id += 1
+            req_id = self._node_request_id
+            self._node_waiters[req_id] = waiter
+            try:
+                self._node.stdin.write(_json_dumps({"id": req_id, "url": url}) + "\n")
+                self._node.stdin.flush()
+            except Exception as e:
+                self._node_waiters.pop(req_id, None)
+                self.logger.error(f"Puppeteer sidecar I/O failed for {url}: {e}")
+                self._kill_node()
+                return None
+
+        # Wait outside the lock so renders overlap (sidecar pages run
+        # concurrently); budget = Node-side 85s render timeout plus slack
+        if not waiter["event"].wait(timeout=100):
+            with self._node_lock:
+                self._node_waiters.pop(req_id, None)
+            self.logger.error(f"Puppeteer sidecar timed out rendering {url}")
+            return None
+
+        rendered = waiter["result"]
+        if rendered is None:
+            self.logger.error(f"Puppeteer sidecar died while rendering {url}")
+            return None
+        if rendered.get("error"):
+            self.logger.error(f"Puppeteer error for {url}: {rendered['error']}")
+            return None
+        return rendered
+
+    def closed(self, reason):
+        self._kill_node()
+        if _GPT_CACHE is not None:
+            _GPT_CACHE.close()
+
+    def _cache_key(self, payload):
+        if _GPT_CACHE is None:
+            return None
+        blob = payload["model"] + "".join(m["content"] for m in payload["messages"])
+        return hashlib.sha256(blob.encode("utf-8", "replace")).hexdigest()
+
+    def _chat_completion(self, payload, timeout=None):
+        """POST a chat payload to OpenAI, going through the on-disk cache when enabled."""
+        key = self._cache_key(payload)
+        if key is not None:
+            cached = _GPT_CACHE.get(key)
+            if cached is not None:
+                self.logger.debug(f"GPT cache hit ({key[:12]}…)")
+                return cached
+
+        if timeout is not None:
+            r = _OPENAI.post("/v1/chat/completions", json=payload, timeout=timeout)
+        else:
+            r = _OPENAI.post("/v1/chat/completions", json=payload)
+        r.raise_for_status()
+        completion = r.json()["choices"][0]["message"]["content"].strip()
+
+        if key is not None:
+            _GPT_CACHE.put(key, payload["model"], completion)
+        return completion
+
+    def _chat_completions_concurrent(self, payloads):
+        """Fire several chat payloads at once; returns one completion (or None
+        on failure) per payload, in order. Cache hits never leave the process;
+        only the misses go out, concurrently over one async client."""
+        completions = [None] * len(payloads)
+        misses = []
+        for i, payload in enumerate(payloads):
+            key = self._cache_key(payload)
+            if key is not None:
+                cached = _GPT_CACHE.get(key)
+                if cached is not None:
+                    completions[i] = cached
+                    continue
+            misses.append((i, key, payload))
+
+        if not misses:
+            return completions
+
+        async def run():
+            async with _make_openai_async_client() as client:
+                async def one(payload):
+                    r = await client.post("/v1/chat/completions", json=payload)
+                    r.raise_for_status()
+                    return r.json()["choices"][0]["message"]["content"].strip()
+                return await asyncio.gather(
+                    *(one(p) for _, _, p in misses), return_exceptions=True
+                )
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            results = asyncio.run(run())
+        else:
+            # Already inside a running loop — the close-spider drain runs on
+            # the reactor thread, which under AsyncioSelectorReactor IS an
+            # asyncio loop. Run the burst on its own loop in a worker thread.
+            box = {}
+            worker = threading.Thread(target=lambda: box.update(r=asyncio.run(run())))
+            worker.start()
+            worker.join()
+            results = box.get("r")
+            if results is None:
+                self.logger.error("Concurrent GPT burst thread failed")
+                return completions
+        for (i, key, payload), result in zip(misses, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Concurrent GPT call failed: {result}")
+                continue
+            completions[i] = result
+            if key is not None:
+                _GPT_CACHE.put(key, payload["model"], result)
+        return completions
 
     def safe_parse_gpt_json(self, text, url):
         """Safely extract and parse JSON from GPT response."""
-        text = re.sub(r'^```(?:json)?\s*|\s*```$', '', text.strip(), flags=re.MULTILINE)
-        text = text.strip()
-        match = re.search(r'\{.*\}', text, re.DOTALL)
-        if not match:
+        text = _CODEFENCE.sub('', text.strip()).strip()
+        span = _find_json_span(text)
+        if not span:
             self.logger.error(f"No JSON object found in GPT response for {url}: {text[:500]}")
             return None
         try:
-            return json.loads(match.group(0))
-        except json.JSONDecodeError as e:
-            self.logger.error(f"JSON decode failed for {url}: {e} — Raw: {match.group(0)[:200]}")
+            return _json_loads(span)
+        except ValueError as e:
+            self.logger.error(f"JSON decode failed for {url}: {e} — Raw: {span[:200]}")
+            return None
+
+    def safe_parse_gpt_json_list(self, text, url):
+        """Like safe_parse_gpt_json but extracts the outermost JSON array."""
+        text = _CODEFENCE.sub('', text.strip()).strip()
+        span = _find_json_span(text, "[", "]")
+        if not span:
+            self.logger.error(f"No JSON array found in GPT response for {url}: {text[:500]}")
+            return None
+        try:
+            return _json_loads(span)
+        except ValueError as e:
+            self.logger.error(f"JSON decode failed for {url}: {e} — Raw: {span[:200]}")
+            return None
+
+    def queue_relevance_check(self, content: str, url: str):
+        """Buffer a page for the batched relevance check; flush when the batch fills up."""
+        with self._batch_lock:
+            self.pending_relevance.append({"url": url, "content": _normalize_body(content)[:9000]})
+            pending_chars = sum(len(e["content"]) for e in self.pending_relevance)
+            full = len(self.pending_relevance) >= RELEVANCE_BATCH_SIZE or pending_chars >= RELEVANCE_BATCH_CHAR_BUDGET
+        if full:
+            yield from self.flush_relevance_batch()
+
+    def flush_relevance_batch(self):
+        """Run one batched relevance call over everything queued so far and yield the hits."""
+        with self._batch_lock:
+            batch, self.pending_relevance = self.pending_relevance, []
+        batch = [e for e in batch if not looks_like_scaffolding(e["content"])]
+        if not batch:
+            return
+
+        items = self.gpt_sci_tech_relevance_batch(batch)
+        if items is None:
+            # Batched call/parse failed — retry the pages individually, but
+            # fire the whole burst concurrently instead of serializing it
+            self.logger.warning(f"Batched relevance check failed; retrying {len(batch)} pages concurrently")
+            payloads = [self._relevance_payload(e["content"]) for e in batch]
+            outputs = self._chat_completions_concurrent(payloads)
+            for entry, output in zip(batch, outputs):
+                if output is None:
+                    continue
+                item = self._parse_relevance(output, entry["url"])
+                if item:
+                    self.logger.info(f"✅ Yielding relevant item from: {entry['url']}")
+                    yield item
+            return
+
+        for item in items:
+            self.logger.info(f"✅ Yielding relevant item from: {item.get('url', 'unknown')}")
+            yield item
+
+    def gpt_sci_tech_relevance_batch(self, batch: list):
+        """One OpenAI call judging a whole batch; returns relevant items or None on failure."""
+        if not GPT_API_KEY:
+            self.logger.error("Missing gpt_api_key in config.json")
+            return None
+
+        system_prompt = (
+            "You are an inclusive curator of science & technology content reviewing several pages at once.\n"
+            "Keep anything that is about science or technology—broadly defined. When unsure, mark it as relevant.\n\n"
+            "Return ONLY a JSON array with one object per numbered page:\n"
+            '  [{"index": 0, "is_relevant": bool, "summary": "3–4 clear sentences"}, ...]\n\n'
+            "Reject only obvious non-content pages (admin/login/privacy/terms), empty stubs, or pure navigation pages with no article."
+        )
+
+        user_content = "\n\n".join(
+            f"### Page {i}\nURL: {entry['url']}\n{entry['content']}"
+            for i, entry in enumerate(batch)
+        )
+
+        payload = {
+            "model": CFG.get("openai_model", "gpt-4o-mini"),
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_content}
+            ],
+            "temperature": 0.2,
+            "max_tokens": 500 * len(batch)
+        }
+
+        try:
+            output = self._chat_completion(payload, timeout=120)
+
+            parsed = self.safe_parse_gpt_json_list(output, f"batch of {len(batch)}")
+            if not isinstance(parsed, list):
+                return None
+
+            items = []
+            seen_indexes = set()
+            for verdict in parsed:
+                if not isinstance(verdict, dict):
+                    continue
+                try:
+                    idx = int(verdict.get("index", -1))
+                except (ValueError, TypeError):
+                    continue
+                # Explicit range check: a missing/negative index would
+                # otherwise resolve to the END of the batch and pin the
+                # verdict on the wrong URL. Duplicates keep the first verdict.
+                if not 0 <= idx < len(batch) or idx in seen_indexes:
+                    continue
+                seen_indexes.add(idx)
+                entry = batch[idx]
+                if verdict.get("is_relevant"):
+                    items.append({
+                        "is_relevant": True,
+                        "summary": verdict.get("summary", ""),
+                        "url": entry["url"]
+                    })
+                else:
+                    self.logger.info(f"Not relevant per GPT: {entry['url']} — {verdict.get('summary','')[:120]}")
+            return items
+
+        except Exception as e:
+            self.logger.error(f"Batched GPT evaluation failed: {e}")
             return None
 
     def gpt_navigation_decision(self, content: str, current_url: str, breadcrumbs: list, depth: int = 0):
@@ -399,11 +880,8 @@ class ScienceTechSpider(scrapy.Spider):
             self.logger.error("Missing GPT API key")
             return None
 
-        if depth >= MAX_DEPTH:
-            return {"action": "decide", "url": current_url, "breadcrumbs": breadcrumbs}
-
         try:
-            data = json.loads(content)
+            data = _json_loads(content)
             body = data.get("body", "")
             links = data.get("links", []) or []
             link_text = "\nLinks:\n" + "\n".join(
@@ -411,15 +889,21 @@ class ScienceTechSpider(scrapy.Spider):
             )
             content_for_model = f"{body}\n{link_text}"
         except Exception:
+            body = ""
             content_for_model = content
 
+        # Router shortcut: a deep, content-heavy URL is almost always an
+        # article page — decide locally and skip the API round-trip.
+        if len(body) > 2000 and structural_score_link(current_url, "", current_url) >= 4:
+            self.logger.debug(f"Nav heuristic: treating {current_url} as article (no API call)")
+            return {"action": "decide", "url": current_url, "breadcrumbs": breadcrumbs}
+
         system_prompt = (
             "You help a crawler move from index pages to story pages about science and technology.\n"
             "Return ONLY JSON with keys:\n"
             '  action: "decide" | "follow_link"\n'
             '  url: absolute URL if action == "follow_link" (must be one of the provided links)\n'
-            "  reason: brief note\n"
-            "  breadcrumbs: echo the breadcrumbs you were given\n\n"
+            "  reason: brief note\n\n"
             "Pick 'decide' if the CURRENT page looks like a specific article/story (not a generic landing page).\n"
             "Pick 'follow_link' if the page looks like an index and any link appears to lead to a specific article/story.\n"
             "Be permissive and pragmatic. Do not invent links."
@@ -429,24 +913,19 @@ class ScienceTechSpider(scrapy.Spider):
         self.logger.debug(f"GPT Navigation Prompt (url={current_url}):\n{user_content[:1000]}")
 
         payload = {
-            "model": CFG.get("openai_model", "gpt-4o-mini"),
+            # decide/follow_link is a trivial classification; a small nav model
+            # is plenty (and 2-4x faster) — override with "nav_model" in config
+            "model": CFG.get("nav_model", CFG.get("openai_model", "gpt-4o-mini")),
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_content}
             ],
             "temperature": 0.2,
-            "max_tokens": 350
+            "max_tokens": 80
         }
 
         try:
-            r = httpx.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={"Authorization": f"Bearer {GPT_API_KEY}"},
-                json=payload,
-                timeout=60
-            )
-            r.raise_for_status()
-            completion = r.json()["choices"][0]["message"]["content"].strip()
+            completion = self._chat_completion(payload)
             self.logger.debug(f"GPT Navigation Response (url={current_url}):\n{completion}")
 
             parsed = self.safe_parse_gpt_json(completion, current_url)
@@ -458,7 +937,7 @@ class ScienceTechSpider(scrapy.Spider):
                 link_url = parsed.get("url")
                 if not link_url:
                     return None
-                if not urlparse(link_url).scheme:
+                if not _split(link_url).scheme:
                     parsed["url"] = urljoin(current_url, link_url)
                 else:
                     parsed["url"] = link_url
@@ -474,21 +953,7 @@ class ScienceTechSpider(scrapy.Spider):
             self.logger.error(f"GPT navigation failed for {current_url}: {e}")
             return None
 
-    def gpt_sci_tech_relevance_check(self, content: str, url: str):
-        if not GPT_API_KEY:
-            self.logger.error("Missing gpt_api_key in config.json")
-            return None
-
-        # Only skip obvious non-content scaffolding
-        scaffolding_terms = [
-            "privacy policy", "terms of use", "about us", "contact",
-            "advertise with us", "copyright", "login", "sign up",
-            "cookie policy", "accessibility statement"
-        ]
-        if any(term in (content or "").lower() for term in scaffolding_terms):
-            self.logger.debug(f"Skipping scaffolding page: {url}")
-            return None
-
+    def _relevance_payload(self, content: str) -> dict:
         system_prompt = (
             "You are an inclusive curator of science & technology content.\n"
             "Keep anything that is about science or technology—broadly defined. When unsure, mark it as relevant.\n\n"
@@ -499,86 +964,101 @@ class ScienceTechSpider(scrapy.Spider):
             "Reject only obvious non-content pages (admin/login/privacy/terms), empty stubs, or pure navigation pages with no article."
         )
 
-        self.logger.debug(f"GPT Relevance Prompt (url={url}):\n{content[:1000]}")
-
-        payload = {
-            "model": CFG.get("openai_model", "gpt-4o-mini"),
+        model = CFG.get("openai_model", "gpt-4o-mini")
+        return {
+            "model": model,
             "messages": [
                 {"role": "system", "content": system_prompt},
-                {"role": "user", "content": content[:9000]}
+                {"role": "user", "content": _clip_tokens(_normalize_body(content), model)}
             ],
             "temperature": 0.2,
             "max_tokens": 500
         }
 
-        try:
-            r = httpx.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={"Authorization": f"Bearer {GPT_API_KEY}"},
-                json=payload,
-                timeout=60
-            )
-            r.raise_for_status()
-            output = r.json()["choices"][0]["message"]["content"].strip()
-            self.logger.debug(f"GPT Relevance Response (url={url}):\n{output}")
-            
-            parsed = self.safe_parse_gpt_json(output, url)
-            if not parsed:
-                return None
-
-            if not isinstance(parsed, dict):
-                self.logger.error(f"GPT returned non-dict for {url}: {parsed}")
-                return None
-
-            if "is_relevant" not in parsed:
-                self.logger.error(f"GPT response missing 'is_relevant' for {url}: {parsed}")
-                return None
+    def _parse_relevance(self, output: str, url: str):
+        parsed = self.safe_parse_gpt_json(output, url)
+        if not parsed:
+            return None
 
-            if parsed.get("is_relevant"):
-                parsed["url"] = url
-                self.logger.info(f"✅ Relevant: {url}")
-                return parsed
-            else:
-                self.logger.info(f"Not relevant per GPT: {url} — {parsed.get('summary','')[:120]}")
-                return None
+        if not isinstance(parsed, dict):
+            self.logger.error(f"GPT returned non-dict for {url}: {parsed}")
+            return None
 
-        except Exception as e:
-            self.logger.error(f"GPT evaluation failed for {url}: {e}")
+        if "is_relevant" not in parsed:
+            self.logger.error(f"GPT response missing 'is_relevant' for {url}: {parsed}")
             return None
 
+        if parsed.get("is_relevant"):
+            parsed["url"] = url
+            self.logger.info(f"✅ Relevant: {url}")
+            return parsed
+        else:
+            self.logger.info(f"Not relevant per GPT: {url} — {parsed.get('summary','')[:120]}")
+            return None
 
 class CollectPipeline:
-    def __init__(self):
-        self.results = []
+    """Streams items to disk as they arrive.
+
+    Both files are written incrementally as JSON arrays (one element per
+    item), so memory stays O(one item) instead of O(whole crawl).
+    """
+
+    def open_spider(self, spider):
+        self._debug_f = open(BASE_DIR / "debug_all_results.json", "wb")
+        self._out_f = open(OUTPUT_PATH, "wb")
+        self._debug_f.write(b"[")
+        self._out_f.write(b"[")
+        self._debug_count = 0
+        self._relevant_count = 0
+
+    def _emit(self, item):
+        data = _json_dumps(dict(item)).encode("utf-8")
+        self._debug_f.write((b",\n" if self._debug_count else b"\n") + data)
+        self._debug_count += 1
+        if item.get("is_relevant"):
+            self._out_f.write((b",\n" if self._relevant_count else b"\n") + data)
+            self._relevant_count += 1
 
     def process_item(self, item, spider):
-        self.results.append(item)
+        self._emit(item)
         return item
 
     def close_spider(self, spider):
-        # Debug: all relevant items we found
-        debug_path = BASE_DIR / "debug_all_results.json"
-        with open(debug_path, "w", encoding="utf-8") as f:
-            json.dump(self.results, f, indent=2)
-
-        # Final: only relevant science/tech updates
-        relevant_entries = [i for i in self.results if i.get("is_relevant")]
-        with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-            json.dump(relevant_entries, f, indent=2)
-
-        spider.logger.info(f"Wrote {len(relevant_entries)} relevant entries to {OUTPUT_PATH}")
+        try:
+            # Drain any pages still waiting on a batched relevance check
+            for item in spider.flush_relevance_batch():
+                self._emit(item)
+        finally:
+            # Terminate the arrays no matter what — a failed drain must not
+            # leave digest.json unparseable for email_writer
+            for f in (self._debug_f, self._out_f):
+                try:
+                    f.write(b"\n]\n")
+                    f.close()
+                except OSError as e:
+                    spider.logger.error(f"Failed to finalize {f.name}: {e}")
+
+        spider.logger.info(f"Wrote {self._relevant_count} relevant entries to {OUTPUT_PATH}")
 
 
 # ---------- runner helpers ----------
 SCRAPY_SETTINGS = {
     "LOG_LEVEL": "DEBUG",
     "ITEM_PIPELINES": {PIPELINE_PATH: 1},
-    "DOWNLOAD_TIMEOUT": 45,
+    "DOWNLOAD_TIMEOUT": 30,
     "RETRY_ENABLED": True,
     "RETRY_TIMES": 2,
     "COOKIES_ENABLED": False,
     "HTTPERROR_ALLOW_ALL": True,
     "USER_AGENT": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36",
+    # Concurrency: page processing runs in the reactor threadpool, so these
+    # actually produce overlap now; pool sizes match the httpx client limits
+    "CONCURRENT_REQUESTS": 16,
+    "CONCURRENT_REQUESTS_PER_DOMAIN": 4,
+    "REACTOR_THREADPOOL_MAXSIZE": 32,
+    "TWISTED_REACTOR": "twisted.internet.asyncioreactor.AsyncioSelectorReactor",
+    # Spread scheduling across domains instead of draining one seed at a time
+    "SCHEDULER_PRIORITY_QUEUE": "scrapy.pqueues.DownloaderAwarePriorityQueue",
     # Crawl guardrails
     "DEPTH_LIMIT": MAX_DEPTH,
     "CLOSESPIDER_PAGECOUNT": MAX_PAGES_BUDGET,
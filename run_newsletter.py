@@ -1,98 +1,264 @@
 # run_newsletter.py
-import argparse
+import functools
+import json
 import sys
 import os
+import queue
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from time import gmtime, monotonic, strftime, time as _time
 
-import boto3
+# boto3 and the pipeline stages (scraper, email_writer) are imported lazily
+# at their call sites: together they pull in scrapy/Twisted/botocore, which
+# dominates interpreter startup and is pure waste for --help or early exits.
 
-# Local imports
-import main_scraper.scraper as scraper
-import email_writer
-import subprocess  # NEW: to run api_harvester before scraper
-
-BASE_DIR = Path(__file__).resolve().parent
+# abspath instead of resolve(): no symlink-chasing stat chain at import
+BASE_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
 LOG_DIR = BASE_DIR / "logs"
-LOG_DIR.mkdir(exist_ok=True)
+try:
+    LOG_DIR.mkdir()
+except FileExistsError:
+    pass
 
 def log_path() -> Path:
     ts = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
     return LOG_DIR / f"run_newsletter_{ts}.log"
 
+class LogWriter:
+    """Group-commit wrapper around the log file.
+
+    Callers enqueue lines and return immediately; one daemon thread drains
+    the queue and coalesces whatever has accumulated into a single write().
+    Exposes flush()/fileno() so fsync_log works on it unchanged.
+    """
+
+    def __init__(self, file):
+        self._file = file
+        self._q = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, line: str):
+        self._q.put(line)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            lines = [self._q.get()]
+            while True:
+                try:
+                    lines.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            got = len(lines)
+            if lines[-1] is None:  # close() sentinel; always enqueued last
+                stop = True
+                lines.pop()
+            if lines:
+                try:
+                    self._file.write("".join(lines))
+                    self._file.flush()
+                except Exception:
+                    pass
+            for _ in range(got):
+                self._q.task_done()
+
+    def flush(self):
+        self._q.join()  # wait until everything queued so far hit the file
+        self._file.flush()
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self._q.put(None)
+        self._thread.join(timeout=5)
+
+# Timestamp cache: log bursts (tracebacks, step transitions) land within the
+# same second, so skip re-running strftime until the second ticks over
+_last_stamp = (None, "")
+
+def _utc_stamp() -> str:
+    global _last_stamp
+    now = int(_time())
+    if _last_stamp[0] != now:
+        _last_stamp = (now, strftime("%Y-%m-%dT%H:%M:%SZ", gmtime(now)))
+    return _last_stamp[1]
+
+# Mirror log lines to stdout only when someone is watching (a terminal) or
+# explicitly asked for it; under cron/systemd the mirror just gets captured
+# and rewritten to the journal, doubling the write volume for nothing
+_TO_STDOUT = sys.stdout.isatty() or os.environ.get("NEWSLETTER_LOG_STDOUT") == "1"
+
 def log(msg: str, file):
-    stamp = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-    print(f"{stamp} {msg}", flush=True)
+    stamp = _utc_stamp()
+    if _TO_STDOUT:
+        sys.stdout.write(f"{stamp} {msg}\n")
+        sys.stdout.flush()
     try:
         file.write(f"{stamp} {msg}\n")
+    except Exception:
+        pass
+
+def fsync_log(file):
+    """Durability point: force the log to disk at phase boundaries only."""
+    try:
         file.flush()
         os.fsync(file.fileno())
     except Exception:
         pass
 
+@functools.lru_cache(maxsize=4)
+def _get_ec2_client(region: str):
+    import boto3
+    from botocore.config import Config
+
+    # Client construction resolves the credential chain and loads service
+    # models — pay that once per region, not per call. Short timeouts so a
+    # dead endpoint can't stall shutdown indefinitely; the pool stays small
+    # since this client only ever issues StopInstances.
+    cfg = Config(
+        connect_timeout=3,
+        read_timeout=5,
+        retries={"mode": "standard", "max_attempts": 3},
+        max_pool_connections=4,
+    )
+    session = boto3.session.Session()
+    # Empty region: defer to the session's own resolution (config files,
+    # IMDS on EC2) rather than giving up — the common case on instances
+    # launched without AWS_REGION in the environment
+    return session.client("ec2", region_name=region or session.region_name, config=cfg)
+
 def stop_instance(instance_id: str, region: str, logf):
     try:
-        ec2 = boto3.client("ec2", region_name=region)
+        ec2 = _get_ec2_client(region)
         ec2.stop_instances(InstanceIds=[instance_id])
-        log(f"Requested stop for instance {instance_id} in {region}.", logf)
+        log(f"Requested stop for instance {instance_id} in {ec2.meta.region_name}.", logf)
     except Exception as e:
         log(f"ERROR stopping instance: {e}", logf)
 
+def _time_step(name: str, fn, logf):
+    """Run one pipeline step and log a single structured record for it.
+
+    One JSON line per step (instead of separate before/after lines) keeps
+    timestamp formatting and write overhead off the hot path and makes the
+    log greppable by step name.
+    """
+    t0 = monotonic()
+    fn()
+    record = {"step": name, "elapsed_ms": round((monotonic() - t0) * 1000), "ok": True}
+    log(json.dumps(record), logf)
+
 def run_api_harvester(logf):
     """Run API harvester before scraper to fetch URLs + filter via GPT."""
     try:
-        log("Running api_harvester.py…", logf)
-        result = subprocess.run(
-            [sys.executable, str(BASE_DIR / "api_harvester.py")],
-            cwd=BASE_DIR
-        )
-        if result.returncode != 0:
-            raise RuntimeError("api_harvester.py failed")
-        log("api_harvester.py completed successfully.", logf)
+        # In-process call (like scraper/email_writer below) instead of spawning
+        # a second interpreter that re-imports boto3 & friends from scratch.
+        # Lazy import so its heavy dependencies load only when we get here.
+        try:
+            import api_harvester
+        except ImportError:
+            # Import can fail when the harvester's dependency set diverges
+            # from ours; fall back to an isolated interpreter. Child output
+            # goes straight into the log file (one fd, no pipe layer);
+            # flush the queued writer first so lines stay ordered.
+            import subprocess
+            log("api_harvester import failed; running as subprocess.", logf)
+            logf.flush()
+            subprocess.run(
+                [sys.executable, str(BASE_DIR / "api_harvester.py")],
+                cwd=BASE_DIR,
+                env=os.environ,
+                close_fds=True,
+                start_new_session=True,
+                stdout=logf,
+                stderr=subprocess.STDOUT,
+                check=True,
+            )
+        else:
+            api_harvester.main()
     except Exception as e:
-        log(f"ERROR running api_harvester.py: {e}", logf)
-        raise
+        log(f"ERROR running api_harvester: {e}", logf)
+        raise RuntimeError("api_harvester.py failed") from e
+
+def parse_args():
+    if len(sys.argv) > 1:
+        # Only pay for argparse when there's actually something to parse
+        # (this also keeps -h/--help working)
+        import argparse
+
+        ap = argparse.ArgumentParser(description="Run scraper + newsletter orchestrator.")
+        ap.add_argument("--shutdown-on-success", action="store_true",
+                        help="Stop the EC2 instance only if all steps succeed.")
+        ap.add_argument("--always-shutdown", action="store_true",
+                        help="Always stop the instance at the end (even on failure).")
+        ap.add_argument("--instance-id", default=os.environ.get("INSTANCE_ID", ""),
+                        help="EC2 instance ID (or set env INSTANCE_ID).")
+        ap.add_argument("--region", default=os.environ.get("AWS_REGION", os.environ.get("AWS_DEFAULT_REGION", "")),
+                        help="AWS region (or set env AWS_REGION/AWS_DEFAULT_REGION).")
+        return ap.parse_args()
+    # No-arg invocation (the cron/systemd norm): same defaults, no argparse
+    from types import SimpleNamespace
+    return SimpleNamespace(
+        shutdown_on_success=False,
+        always_shutdown=False,
+        instance_id=os.environ.get("INSTANCE_ID", ""),
+        region=os.environ.get("AWS_REGION", os.environ.get("AWS_DEFAULT_REGION", "")),
+    )
 
 def main():
-    ap = argparse.ArgumentParser(description="Run scraper + newsletter orchestrator.")
-    ap.add_argument("--shutdown-on-success", action="store_true",
-                    help="Stop the EC2 instance only if all steps succeed.")
-    ap.add_argument("--always-shutdown", action="store_true",
-                    help="Always stop the instance at the end (even on failure).")
-    ap.add_argument("--instance-id", default=os.environ.get("INSTANCE_ID", ""),
-                    help="EC2 instance ID (or set env INSTANCE_ID).")
-    ap.add_argument("--region", default=os.environ.get("AWS_REGION", os.environ.get("AWS_DEFAULT_REGION", "")),
-                    help="AWS region (or set env AWS_REGION/AWS_DEFAULT_REGION).")
-    args = ap.parse_args()
+    args = parse_args()
 
     lp = log_path()
-    with open(lp, "a", encoding="utf-8") as logf:
+    # O_APPEND makes every write() land atomically at EOF, so overlapping
+    # runs sharing a log can't interleave mid-line; fsync stays reserved
+    # for the phase boundaries in fsync_log
+    fd = os.open(str(lp), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    with os.fdopen(fd, "a", buffering=8192, encoding="utf-8") as logfile:
+        logf = LogWriter(logfile)
         log(f"=== Run start; cwd={os.getcwd()} base={BASE_DIR}", logf)
         ok = False
         try:
             # Ensure we run relative paths from repo root
             os.chdir(BASE_DIR)
 
-            # Step 1: Run API harvester
-            run_api_harvester(logf)
+            def run_scraper():
+                # Run scraper (now uses api_urls.json), warming the email
+                # writer's setup (config, template, S3 client) in parallel
+                import main_scraper.scraper as scraper
+                import email_writer
+                with ThreadPoolExecutor(max_workers=1) as pool:
+                    prewarm_future = pool.submit(email_writer.prewarm)
+                    scraper.main()
+                    try:
+                        prewarm_future.result()
+                    except Exception as e:
+                        # main() reloads anything prewarm didn't deliver
+                        log(f"WARNING: email_writer.prewarm failed: {e}", logf)
 
-            # Step 2: Run scraper (now uses api_urls.json)
-            log("Running scraper.main()…", logf)
-            scraper.main()
+            def run_email_writer():
+                import email_writer
+                email_writer.main()
 
-            # Step 3: Run email writer
-            log("Running email_writer.main()…", logf)
-            email_writer.main()
+            _time_step("api_harvester", lambda: run_api_harvester(logf), logf)
+            _time_step("scraper", run_scraper, logf)
+            _time_step("email_writer", run_email_writer, logf)
 
             ok = True
             log("All steps completed successfully.", logf)
+            fsync_log(logf)
 
         except Exception as e:
             log("FATAL error during newsletter run:", logf)
-            tb = "".join(traceback.format_exception(type(e), e, e.__traceback__))
-            for line in tb.rstrip().splitlines():
-                log(line, logf)
+            # Stream the traceback straight into the writers instead of
+            # materialising it as one string and re-splitting it
+            if _TO_STDOUT:
+                traceback.print_exception(type(e), e, e.__traceback__, file=sys.stdout)
+            traceback.print_exception(type(e), e, e.__traceback__, file=logf)
+            fsync_log(logf)
 
         finally:
             # Decide shutdown behavior
@@ -108,15 +274,29 @@ def main():
 
             log(f"Shutdown decision: {do_shutdown} ({reason})", logf)
 
+            stop_thread = None
             if do_shutdown:
                 instance_id = args.instance_id
                 region = args.region
-                if not instance_id or not region:
-                    log("Missing instance-id or region; skipping shutdown.", logf)
+                if not instance_id:
+                    log("Missing instance-id; skipping shutdown.", logf)
                 else:
-                    stop_instance(instance_id, region, logf)
+                    # Fire the StopInstances call in the background so its
+                    # TLS + API round-trip overlaps the final log flush;
+                    # the stop is asynchronous server-side anyway. Empty
+                    # region is fine: stop_instance resolves it via boto3.
+                    stop_thread = threading.Thread(
+                        target=stop_instance,
+                        args=(instance_id, region, logf),
+                        daemon=False,
+                    )
+                    stop_thread.start()
 
             log(f"Log written to {lp}", logf)
+            if stop_thread is not None:
+                stop_thread.join(timeout=5)
+            fsync_log(logf)
+            logf.close()
 
 if __name__ == "__main__":
     sys.exit(main() or 0)